@@ -1,13 +1,79 @@
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import hashlib
 import json
 import os
+import re
+import shutil
 import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from datetime import datetime
+from pathlib import Path
 from google import genai
 from google.genai import types
 from config_azure import GEMINI_API_KEY, TRANSCRIPT_GEMINI_API_KEY
 
+# orjson parses large Gemini responses much faster; fall back to the stdlib if missing
+try:
+    import orjson
+except ImportError:
+    import json as orjson
+
+# Gemini upload/generate calls are network-bound; cap concurrent transcriptions
+MAX_PARALLEL_TRANSCRIPTIONS = 6
+
+# Uploaded files must be ACTIVE before generateContent can reference them
+FILE_ACTIVE_TIMEOUT = 120
+FILE_STATE_POLL_INTERVAL = 0.25
+
+# Uploaded audio below this size is sent from memory instead of a temp file
+IN_MEMORY_UPLOAD_LIMIT = 50 * 1024 * 1024
+
+# MIME types for supported audio file extensions
+MIME_TYPE_MAP = {
+    '.wav': 'audio/wav',
+    '.mp3': 'audio/mpeg',
+    '.m4a': 'audio/mp4',
+    '.ogg': 'audio/ogg',
+    '.flac': 'audio/flac'
+}
+
+# Text processing model and config are static, so build them once at import
+TEXT_MODEL = "gemini-2.0-flash"
+
+SAFETY_SETTINGS = [
+    {
+        "category": types.HarmCategory.HARM_CATEGORY_HATE_SPEECH,
+        "threshold": types.HarmBlockThreshold.BLOCK_NONE
+    },
+    {
+        "category": types.HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT,
+        "threshold": types.HarmBlockThreshold.BLOCK_NONE
+    },
+    {
+        "category": types.HarmCategory.HARM_CATEGORY_HARASSMENT,
+        "threshold": types.HarmBlockThreshold.BLOCK_NONE
+    },
+    {
+        "category": types.HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT,
+        "threshold": types.HarmBlockThreshold.BLOCK_NONE
+    }
+]
+
+GENERATE_CONTENT_CONFIG = types.GenerateContentConfig(safety_settings=SAFETY_SETTINGS)
+
+# Transcripts longer than this are split and processed in parallel chunks
+TEXT_CHUNK_CHARS = 24000
+# Chunk boundaries in order of preference: paragraphs, lines, sentences
+TEXT_CHUNK_SEPARATORS = [r"\n\s*\n", r"\n", r"(?<=[.!?])\s+"]
+MAX_PARALLEL_TEXT_CHUNKS = 4
+
 # Configure Streamlit page
 st.set_page_config(
     page_title="Gemini Audio & Text Processor",
@@ -16,8 +82,26 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+@st.cache_resource
+def get_http_session():
+    """Create a pooled HTTP session shared across reruns and worker threads"""
+    session = requests.Session()
+    session.mount('https://', HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=20,
+        max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+    ))
+    return session
+
+SESSION = get_http_session()
+
+@st.cache_resource
+def get_genai_client(api_key):
+    """Create the Gemini client once and reuse it across reruns"""
+    return genai.Client(api_key=api_key)
+
 # Custom CSS for dark/light mode support
-st.markdown("""
+CSS_BLOCK = """
 <style>
     .main-header {
         font-size: 2.5rem;
@@ -51,18 +135,21 @@ st.markdown("""
         margin: 1rem 0;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+# Emitted on every run: Streamlit drops elements that a rerun does not re-render,
+# so guarding this behind session_state would lose the styles after the first rerun
+st.markdown(CSS_BLOCK, unsafe_allow_html=True)
 
 def download_audio_from_url(audio_url):
     """Download audio file from URL and return temporary file path"""
     try:
-        import requests
-        response = requests.get(audio_url, stream=True)
+        response = SESSION.get(audio_url, stream=True)
         response.raise_for_status()
         
         # Create temporary file
         with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as tmp_file:
-            for chunk in response.iter_content(chunk_size=8192):
+            for chunk in response.iter_content(chunk_size=1024 * 1024):
                 tmp_file.write(chunk)
             tmp_path = tmp_file.name
         
@@ -71,58 +158,199 @@ def download_audio_from_url(audio_url):
         st.error(f"Error downloading audio from URL: {str(e)}")
         return None
 
-def upload_audio_to_gemini(audio_path, display_name):
-    """Upload audio file to Gemini and return mime_type and file_uri"""
+@contextmanager
+def open_audio_source(audio_source):
+    """Yield a binary file object at offset 0 for a file path or an in-memory file.
+    
+    Paths are opened and closed here; in-memory files are rewound and left open.
+    """
+    if isinstance(audio_source, str):
+        with open(audio_source, 'rb') as audio_file:
+            yield audio_file
+    else:
+        audio_source.seek(0)
+        yield audio_source
+
+def compute_file_hash(audio_source):
+    """Return the SHA-256 hex digest of an audio source, read in 1MB blocks"""
+    digest = hashlib.sha256()
+    with open_audio_source(audio_source) as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _send_resumable_upload(session_url, audio_source, max_attempts=3):
+    """Stream file bytes to a resumable upload session.
+    
+    On a network error or 5xx response the session is queried for how many bytes
+    Gemini has received, and the upload resumes from that offset instead of byte 0.
+    If the query reports the upload as final, its response is returned as-is.
+    """
+    offset = 0
+    for attempt in range(max_attempts):
+        try:
+            if attempt > 0:
+                time.sleep(attempt)
+                status_response = SESSION.post(
+                    session_url,
+                    headers={'X-Goog-Upload-Command': 'query'},
+                    timeout=(5, 60)
+                )
+                if status_response.status_code >= 500:
+                    continue
+                if status_response.status_code != 200:
+                    return status_response
+                
+                upload_status = status_response.headers.get('X-Goog-Upload-Status')
+                if upload_status == 'final':
+                    # The earlier upload completed but its response was lost
+                    return status_response
+                if upload_status != 'active':
+                    raise Exception(f"Upload session is no longer active. Status: {upload_status}")
+                offset = int(status_response.headers.get('X-Goog-Upload-Size-Received', 0))
+            
+            with open_audio_source(audio_source) as audio_file:
+                # requests streams the file object and sizes the body from the current offset
+                audio_file.seek(offset)
+                response = SESSION.post(
+                    session_url,
+                    headers={
+                        'X-Goog-Upload-Command': 'upload, finalize',
+                        'X-Goog-Upload-Offset': str(offset)
+                    },
+                    data=audio_file,
+                    timeout=(5, 300)
+                )
+            if response.status_code < 500 or attempt == max_attempts - 1:
+                return response
+        except requests.exceptions.RequestException:
+            if attempt == max_attempts - 1:
+                raise
+    
+    raise Exception(f"Failed to upload file after {max_attempts} attempts")
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _cached_upload(content_hash, mime_type, _audio_source, _display_name):
+    """Upload audio to Gemini and return its (file_name, file_uri), cached by content hash.
+    
+    Raises on failure so that errors are never cached. Gemini keeps uploaded files
+    for 48 hours; the 1 hour TTL is deliberately shorter so cached URIs stay valid.
+    """
+    # Start a resumable upload session
+    start_url = f"https://generativelanguage.googleapis.com/upload/v1beta/files?key={TRANSCRIPT_GEMINI_API_KEY}"
+    with open_audio_source(_audio_source) as audio_file:
+        num_bytes = audio_file.seek(0, os.SEEK_END)
+    
+    start_response = SESSION.post(
+        start_url,
+        headers={
+            'X-Goog-Upload-Protocol': 'resumable',
+            'X-Goog-Upload-Command': 'start',
+            'X-Goog-Upload-Header-Content-Length': str(num_bytes),
+            'X-Goog-Upload-Header-Content-Type': mime_type
+        },
+        json={'file': {'display_name': _display_name}},
+        timeout=(5, 60)
+    )
+    
+    if start_response.status_code != 200:
+        raise Exception(f"Failed to start upload. Response: {start_response.text}")
+    
+    session_url = start_response.headers.get('X-Goog-Upload-URL')
+    if not session_url:
+        raise Exception("No upload URL returned from upload start")
+    
+    response = _send_resumable_upload(session_url, _audio_source)
+    
+    if response.status_code != 200:
+        raise Exception(f"Failed to upload file. Response: {response.text}")
+    
+    response_json = orjson.loads(response.content)
+    file_name = response_json.get('file', {}).get('name')
+    file_uri = response_json.get('file', {}).get('uri')
+    
+    if not file_uri:
+        raise Exception("No file URI returned from upload")
+    
+    return file_name, file_uri
+
+def start_file_state_poller(file_name, timeout=FILE_ACTIVE_TIMEOUT):
+    """Poll an uploaded Gemini file in a background thread until it leaves PROCESSING.
+    
+    Returns (done, result): done is a threading.Event set once polling stops, and
+    result['state'] holds the last state seen. A 4xx response stops polling and is
+    recorded in result['error']. The thread gives up after timeout seconds.
+    """
+    done = threading.Event()
+    result = {}
+    state_url = f"https://generativelanguage.googleapis.com/v1beta/{file_name}?key={TRANSCRIPT_GEMINI_API_KEY}"
+    deadline = time.monotonic() + timeout
+    
+    def poll():
+        try:
+            while time.monotonic() < deadline:
+                try:
+                    response = SESSION.get(state_url, timeout=(5, 30))
+                    if response.status_code == 200:
+                        result['state'] = orjson.loads(response.content).get('state')
+                        if result['state'] in ('ACTIVE', 'FAILED'):
+                            return
+                    elif 400 <= response.status_code < 500:
+                        # Client errors (e.g. the file was deleted) will not resolve by polling
+                        result['error'] = f"HTTP {response.status_code}: {response.text}"
+                        return
+                except requests.exceptions.RequestException:
+                    pass
+                time.sleep(FILE_STATE_POLL_INTERVAL)
+        finally:
+            done.set()
+    
+    threading.Thread(target=poll, daemon=True).start()
+    return done, result
+
+def upload_audio_to_gemini(audio_source, display_name):
+    """Upload audio (a file path or in-memory file) to Gemini and return mime_type, file_name and file_uri"""
     try:
         # Determine MIME type based on file extension
-        file_extension = os.path.splitext(audio_path)[1].lower()
-        mime_type_map = {
-            '.wav': 'audio/wav',
-            '.mp3': 'audio/mpeg',
-            '.m4a': 'audio/mp4',
-            '.ogg': 'audio/ogg',
-            '.flac': 'audio/flac'
-        }
-        mime_type = mime_type_map.get(file_extension, 'audio/wav')
-        
-        # Upload file to Gemini
-        upload_url = f"https://generativelanguage.googleapis.com/upload/v1beta/files?key={TRANSCRIPT_GEMINI_API_KEY}"
+        extension_source = audio_source if isinstance(audio_source, str) else display_name
+        mime_type = MIME_TYPE_MAP.get(Path(extension_source).suffix.lower(), 'audio/wav')
         
-        with open(audio_path, 'rb') as audio_file:
-            files = {'file': (display_name, audio_file, mime_type)}
-            response = requests.post(upload_url, files=files)
+        # Reuse an earlier upload of identical content instead of re-sending it
+        content_hash = compute_file_hash(audio_source)
+        file_name, file_uri = _cached_upload(content_hash, mime_type, audio_source, display_name)
         
-        if response.status_code != 200:
-            raise Exception(f"Failed to upload file. Response: {response.text}")
-        
-        response_json = response.json()
-        file_uri = response_json.get('file', {}).get('uri')
-        
-        if not file_uri:
-            raise Exception("No file URI returned from upload")
-        
-        return mime_type, file_uri
+        return mime_type, file_name, file_uri
     
     except Exception as e:
         st.error(f"Error uploading audio file: {str(e)}")
-        return None, None
+        return None, None, None
 
-def generate_transcript_from_audio(audio_path, display_name, user_prompt):
-    """Generate transcript from audio using Gemini"""
+def generate_transcript_from_audio(audio_source, display_name, user_prompt):
+    """Generate transcript from audio using Gemini.
+    
+    When audio_source is a temporary file path, the file is deleted as soon as the
+    upload succeeds rather than after generation finishes.
+    """
     try:
         prompt = user_prompt
         
-        mime_type, file_uri = upload_audio_to_gemini(audio_path, display_name)
+        mime_type, file_name, file_uri = upload_audio_to_gemini(audio_source, display_name)
         if not file_uri:
             return None
         
+        # Gemini has its own copy now; free the local temp file during the long generate call
+        if isinstance(audio_source, str):
+            try:
+                os.unlink(audio_source)
+            except FileNotFoundError:
+                pass
+        
+        # Wait for the file to become ACTIVE in the background while the request is built
+        file_ready, file_state = start_file_state_poller(file_name)
+        
         # Generate content using Gemini
         generate_url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={TRANSCRIPT_GEMINI_API_KEY}"
         
-        generate_headers = {
-            "Content-Type": "application/json"
-        }
-        
         generate_body = {
             "contents": [
                 {
@@ -134,12 +362,25 @@ def generate_transcript_from_audio(audio_path, display_name, user_prompt):
             ]
         }
         
-        generate_response = requests.post(generate_url, headers=generate_headers, data=json.dumps(generate_body))
+        # Allow for one in-flight state request finishing after the poller's deadline
+        if not file_ready.wait(FILE_ACTIVE_TIMEOUT + 35):
+            raise Exception("Timed out waiting for the uploaded file to become ACTIVE")
+        if 'error' in file_state:
+            # The cached upload may point at a file Gemini no longer has; re-upload next time
+            _cached_upload.clear()
+            raise Exception(f"Failed to check uploaded file state. Response: {file_state['error']}")
+        if file_state.get('state') == 'FAILED':
+            # Gemini could not process this upload; drop it so a retry uploads afresh
+            _cached_upload.clear()
+        if file_state.get('state') != 'ACTIVE':
+            raise Exception(f"Uploaded file is not ready. State: {file_state.get('state', 'UNKNOWN')}")
+        
+        generate_response = SESSION.post(generate_url, json=generate_body, timeout=(5, 300))
         
         if generate_response.status_code != 200:
             raise Exception(f"Failed to generate content. Response: {generate_response.text}")
         
-        response_json = generate_response.json()
+        response_json = orjson.loads(generate_response.content)
         
         # Extract transcript from response
         for candidate in response_json.get("candidates", []):
@@ -153,55 +394,201 @@ def generate_transcript_from_audio(audio_path, display_name, user_prompt):
         st.error(f"Error generating transcript: {str(e)}")
         return None
 
+def generate_transcripts_parallel(jobs, user_prompt):
+    """Generate transcripts for (audio_source, display_name) jobs concurrently.
+    
+    Each job renders into its own st.status container once a worker picks it up,
+    so its messages (including errors) appear inside that box.
+    Returns a list of (display_name, transcript) in the same order as jobs.
+    """
+    ctx = get_script_run_ctx()
+    results = [None] * len(jobs)
+    
+    # Reserve a slot per job in submission order; jobs waiting for a worker show as queued
+    slots = [st.empty() for _ in jobs]
+    for slot, (_, display_name) in zip(slots, jobs):
+        slot.caption(f"⏳ Queued: {display_name}")
+    
+    def run(slot, audio_source, display_name):
+        # Attach the script context so st.* calls from the worker still render
+        add_script_run_ctx(threading.current_thread(), ctx)
+        status = slot.status(f"Transcribing {display_name}...")
+        with status:
+            transcript = generate_transcript_from_audio(audio_source, display_name, user_prompt)
+        return status, transcript
+    
+    with ThreadPoolExecutor(max_workers=MAX_PARALLEL_TRANSCRIPTIONS) as executor:
+        futures = {
+            executor.submit(run, slots[index], audio_source, display_name): index
+            for index, (audio_source, display_name) in enumerate(jobs)
+        }
+        for future in as_completed(futures):
+            index = futures[future]
+            display_name = jobs[index][1]
+            status, transcript = future.result()
+            results[index] = (display_name, transcript)
+            if transcript:
+                status.update(label=f"Transcribed {display_name}", state="complete")
+            else:
+                status.update(label=f"Failed to transcribe {display_name}", state="error", expanded=True)
+    
+    return results
+
+def chunk_text(transcript, max_chars=TEXT_CHUNK_CHARS):
+    """Split text into chunks of at most max_chars, keeping its separators.
+    
+    Splits on blank lines first, then on line breaks, then on sentence ends, so
+    speaker turns stay intact; only a piece with no such boundary is cut, at the
+    last space where possible. Joining the chunks gives back the original text.
+    """
+    return _split_text(transcript, max_chars, TEXT_CHUNK_SEPARATORS)
+
+def _split_text(text, max_chars, separators):
+    """Recursively split text on the first separator, falling back to the next ones for oversized pieces"""
+    if len(text) <= max_chars:
+        return [text] if text else []
+    
+    if not separators:
+        chunks = []
+        while len(text) > max_chars:
+            cut = text.rfind(' ', 0, max_chars)
+            if cut <= 0:
+                cut = max_chars
+            chunks.append(text[:cut])
+            text = text[cut:]
+        if text:
+            chunks.append(text)
+        return chunks
+    
+    # The capture group keeps each separator so it can be re-attached to its piece
+    parts = re.split(f"({separators[0]})", text)
+    chunks = []
+    current = ""
+    for start in range(0, len(parts), 2):
+        segment = parts[start] + (parts[start + 1] if start + 1 < len(parts) else "")
+        if len(segment) > max_chars:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.extend(_split_text(segment, max_chars, separators[1:]))
+        elif len(current) + len(segment) > max_chars:
+            chunks.append(current)
+            current = segment
+        else:
+            current += segment
+    if current:
+        chunks.append(current)
+    return chunks
+
+def parse_json_output(text):
+    """Parse Gemini JSON output, tolerating a surrounding ```json code fence"""
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        text = text.rsplit("```", 1)[0]
+    return orjson.loads(text)
+
+def format_json_output(text):
+    """Return Gemini output as pretty-printed JSON, or the raw text if it is not valid JSON"""
+    try:
+        return json.dumps(parse_json_output(text), indent=2, ensure_ascii=False)
+    except ValueError:
+        return text
+
+def _generate_text(client, prompt, transcript):
+    """Run a single Gemini text request and return the response text"""
+    contents = [
+        types.Content(
+            role="user",
+            parts=[
+                types.Part.from_text(text=f"Give Proper JSON output as mentioned in the format, that will make it easier to parse.\n{prompt}\n{transcript}")
+            ]
+        )
+    ]
+    
+    response = client.models.generate_content(
+        model=TEXT_MODEL,
+        contents=contents,
+        config=GENERATE_CONTENT_CONFIG
+    )
+    
+    return response.text if response.text else None
+
 def process_text_with_gemini(prompt, transcript):
-    """Process text using Gemini with prompt and transcript"""
+    """Process text using Gemini with prompt and transcript.
+    
+    Short transcripts return the model's text unchanged. Long transcripts are split
+    into chunks that are processed in parallel, then a final Gemini call merges the
+    partial results into the format the prompt asks for.
+    """
     try:
-        client = genai.Client(api_key=GEMINI_API_KEY)
+        client = get_genai_client(GEMINI_API_KEY)
         
-        model = "gemini-2.0-flash"
-        contents = [
-            types.Content(
-                role="user",
-                parts=[
-                    types.Part.from_text(text=f"Give Proper JSON output as mentioned in the format, that will make it easier to parse.\n{prompt}\n{transcript}")
-                ]
-            )
-        ]
+        if len(transcript) < TEXT_CHUNK_CHARS:
+            return _generate_text(client, prompt, transcript)
         
-        config = types.GenerateContentConfig(
-            safety_settings=[
-                {
-                    "category": types.HarmCategory.HARM_CATEGORY_HATE_SPEECH,
-                    "threshold": types.HarmBlockThreshold.BLOCK_NONE
-                },
-                {
-                    "category": types.HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT,
-                    "threshold": types.HarmBlockThreshold.BLOCK_NONE
-                },
-                {
-                    "category": types.HarmCategory.HARM_CATEGORY_HARASSMENT,
-                    "threshold": types.HarmBlockThreshold.BLOCK_NONE
-                },
-                {
-                    "category": types.HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT,
-                    "threshold": types.HarmBlockThreshold.BLOCK_NONE
-                }
-            ]
-        )
+        chunks = chunk_text(transcript)
+        with ThreadPoolExecutor(max_workers=MAX_PARALLEL_TEXT_CHUNKS) as executor:
+            outputs = list(executor.map(lambda chunk: _generate_text(client, prompt, chunk), chunks))
         
-        response = client.models.generate_content(
-            model=model,
-            contents=contents,
-            config=config
-        )
+        if not all(outputs):
+            return None
         
-        return response.text if response.text else None
+        # Reduce: ask Gemini to merge the partial results in the requested format
+        reduce_prompt = (
+            f"{prompt}\n\n"
+            f"The transcript was too long for a single request, so it was processed in {len(outputs)} parts. "
+            "Merge the partial results below into one result that follows exactly the format requested above, "
+            "combining values across parts instead of listing them per part."
+        )
+        partial_results = "\n\n".join(
+            f"Part {index}:\n{output}" for index, output in enumerate(outputs, start=1)
+        )
+        output = _generate_text(client, reduce_prompt, partial_results)
+        return format_json_output(output) if output else None
     
     except Exception as e:
         st.error(f"Error processing with Gemini: {str(e)}")
         return None
 
+@st.fragment
+def render_transcript_result(display_name, transcript, index=0):
+    """Display a generated transcript; its widgets rerun only this fragment"""
+    st.subheader(f"📄 Generated Transcript: {display_name}")
+    # Keyed widgets keep their stored value across runs, so the key must change with the content
+    content_key = hashlib.sha256(transcript.encode('utf-8')).hexdigest()[:16]
+    st.text_area("Transcript", transcript, height=400, disabled=True, key=f"transcript_{index}_{content_key}")
+    
+    # Download button
+    st.download_button(
+        label="📥 Download Transcript",
+        data=transcript,
+        file_name=f"transcript_{os.path.splitext(display_name)[0]}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
+        mime="text/plain",
+        key=f"download_transcript_{index}_{content_key}"
+    )
+
+@st.fragment
+def render_processed_result(result):
+    """Display a processed result; its widgets rerun only this fragment"""
+    st.subheader("📊 Processed Result")
+    st.text_area("Result", result, height=400, disabled=True)
+    
+    # Download button
+    st.download_button(
+        label="📥 Download Result",
+        data=result,
+        file_name=f"processed_result_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
+        mime="text/plain"
+    )
+
 def main():
+    # Initialize persisted results once so reruns do not overwrite them
+    if "last_transcripts" not in st.session_state:
+        st.session_state["last_transcripts"] = []
+    if "last_result" not in st.session_state:
+        st.session_state["last_result"] = None
+    
     st.markdown('<h1 class="main-header">🎵 Gemini Audio & Text Processor</h1>', unsafe_allow_html=True)
     
     # Sidebar for mode selection
@@ -217,99 +604,117 @@ def main():
         st.header("🎤 Audio Transcription")
         st.write("Upload an audio file and provide a prompt to generate a transcript using Gemini AI")
         
-        # Prompt input for audio transcription
-        st.subheader("📋 Enter Your Transcription Prompt")
-        audio_prompt = st.text_area(
-            "Transcription Prompt:",
-            placeholder="Enter your transcription prompt here...",
-            height=150,
-            help="This prompt will guide how Gemini transcribes the audio file"
-        )
-        
-        # Choose input method
+        # Choose input method (outside the form so switching it updates the inputs)
         input_method = st.radio(
             "Choose input method:",
             ["📁 Upload Audio File", "🔗 Audio URL Link"],
             horizontal=True
         )
         
-        uploaded_file = None
+        uploaded_files = []
         audio_url = None
         
-        if input_method == "📁 Upload Audio File":
-            # File upload
-            uploaded_file = st.file_uploader(
-                "Choose an audio file",
-                type=['wav', 'mp3', 'm4a', 'ogg', 'flac'],
-                help="Supported formats: WAV, MP3, M4A, OGG, FLAC"
-            )
-        else:
-            # URL input
-            audio_url = st.text_input(
-                "Enter Audio URL:",
-                placeholder="https://example.com/audio.wav",
-                help="Enter a direct link to an audio file"
+        # Batch inputs in a form so typing does not rerun the script until submit
+        with st.form("audio_form"):
+            # Prompt input for audio transcription
+            st.subheader("📋 Enter Your Transcription Prompt")
+            audio_prompt = st.text_area(
+                "Transcription Prompt:",
+                placeholder="Enter your transcription prompt here...",
+                height=150,
+                help="This prompt will guide how Gemini transcribes the audio file"
             )
-        
-        if uploaded_file is not None or audio_url:
-            if uploaded_file is not None:
-                # Display file details
-                st.write(f"**File:** {uploaded_file.name}")
-                st.write(f"**Size:** {uploaded_file.size} bytes")
-                st.write(f"**Type:** {uploaded_file.type}")
-                display_name = uploaded_file.name
+            
+            if input_method == "📁 Upload Audio File":
+                # File upload
+                uploaded_files = st.file_uploader(
+                    "Choose audio files",
+                    type=['wav', 'mp3', 'm4a', 'ogg', 'flac'],
+                    accept_multiple_files=True,
+                    help="Supported formats: WAV, MP3, M4A, OGG, FLAC"
+                )
             else:
-                # Display URL details
-                st.write(f"**URL:** {audio_url}")
-                display_name = audio_url.split('/')[-1].split('?')[0] or "audio_file"
+                # URL input
+                audio_url = st.text_input(
+                    "Enter Audio URL:",
+                    placeholder="https://example.com/audio.wav",
+                    help="Enter a direct link to an audio file"
+                )
             
             # Process button
-            if st.button("🚀 Generate Transcript", type="primary"):
-                if not audio_prompt.strip():
-                    st.warning("⚠️ Please enter a transcription prompt")
+            submitted = st.form_submit_button("🚀 Generate Transcript", type="primary")
+        
+        if uploaded_files or audio_url:
+            # Collapsed by default; form values only change on submit, so this is not redrawn per keystroke
+            with st.expander("File details", expanded=False):
+                if uploaded_files:
+                    # Display file details
+                    for uploaded_file in uploaded_files:
+                        st.write(f"**File:** {uploaded_file.name}")
+                        st.write(f"**Size:** {uploaded_file.size} bytes")
+                        st.write(f"**Type:** {uploaded_file.type}")
                 else:
-                    with st.spinner("Processing audio..."):
-                        try:
-                            if uploaded_file is not None:
-                                # Save uploaded file temporarily
-                                with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(uploaded_file.name)[1]) as tmp_file:
-                                    tmp_file.write(uploaded_file.getvalue())
-                                    tmp_path = tmp_file.name
-                            else:
-                                # Download from URL
-                                tmp_path = download_audio_from_url(audio_url)
-                                if not tmp_path:
-                                    st.error("❌ Failed to download audio from URL")
-                                    return
-                            
-                            # Generate transcript
-                            transcript = generate_transcript_from_audio(tmp_path, display_name, audio_prompt)
-                            
-                            if transcript:
-                                st.markdown('<div class="success-box">', unsafe_allow_html=True)
-                                st.success("✅ Transcript generated successfully!")
-                                st.markdown('</div>', unsafe_allow_html=True)
-                                
-                                # Display transcript
-                                st.subheader("📄 Generated Transcript")
-                                st.text_area("Transcript", transcript, height=400, disabled=True)
+                    # Display URL details
+                    st.write(f"**URL:** {audio_url}")
+        
+        if submitted:
+            if not (uploaded_files or audio_url):
+                st.warning("⚠️ Please upload an audio file or enter an audio URL")
+            elif not audio_prompt.strip():
+                st.warning("⚠️ Please enter a transcription prompt")
+            else:
+                with st.spinner("Processing audio..."):
+                    tmp_paths = []
+                    try:
+                        jobs = []
+                        if uploaded_files:
+                            for uploaded_file in uploaded_files:
+                                if uploaded_file.size < IN_MEMORY_UPLOAD_LIMIT:
+                                    # Small files are uploaded straight from memory
+                                    jobs.append((uploaded_file, uploaded_file.name))
+                                    continue
                                 
-                                # Download button
-                                st.download_button(
-                                    label="📥 Download Transcript",
-                                    data=transcript,
-                                    file_name=f"transcript_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
-                                    mime="text/plain"
-                                )
-                            else:
-                                st.markdown('<div class="error-box">', unsafe_allow_html=True)
-                                st.error("❌ Failed to generate transcript. Please try again.")
-                                st.markdown('</div>', unsafe_allow_html=True)
+                                # Spill large files to a temporary file
+                                with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(uploaded_file.name)[1]) as tmp_file:
+                                    # Stream to disk in 1MB blocks instead of copying the whole buffer
+                                    uploaded_file.seek(0)
+                                    shutil.copyfileobj(uploaded_file, tmp_file, length=1024 * 1024)
+                                    tmp_paths.append(tmp_file.name)
+                                jobs.append((tmp_file.name, uploaded_file.name))
+                        else:
+                            # Download from URL
+                            tmp_path = download_audio_from_url(audio_url)
+                            if not tmp_path:
+                                st.error("❌ Failed to download audio from URL")
+                                return
+                            tmp_paths.append(tmp_path)
+                            display_name = audio_url.split('/')[-1].split('?')[0] or "audio_file"
+                            jobs.append((tmp_path, display_name))
                         
-                        finally:
-                            # Clean up temporary file
-                            if 'tmp_path' in locals() and os.path.exists(tmp_path):
+                        # Generate transcripts
+                        # Per-file success and errors are reported in each job's status box
+                        results = generate_transcripts_parallel(jobs, audio_prompt)
+                        
+                        # Keep successful transcripts so later reruns can show them without regenerating;
+                        # a run where every file failed leaves the previous results in place
+                        successful = [
+                            (display_name, transcript) for display_name, transcript in results if transcript
+                        ]
+                        if successful:
+                            st.session_state["last_transcripts"] = successful
+                    
+                    finally:
+                        # Clean up temporary files
+                        # (files already uploaded were removed by generate_transcript_from_audio)
+                        for tmp_path in tmp_paths:
+                            try:
                                 os.unlink(tmp_path)
+                            except FileNotFoundError:
+                                pass
+        
+        # Display transcripts from the last successful run
+        for index, (display_name, transcript) in enumerate(st.session_state["last_transcripts"]):
+            render_transcript_result(display_name, transcript, index)
         
         st.markdown('</div>', unsafe_allow_html=True)
     
@@ -318,26 +723,30 @@ def main():
         st.header("📝 Prompt & Transcript Processing")
         st.write("Provide a prompt and transcript to get processed output using Gemini AI")
         
-        # Prompt input
-        st.subheader("📋 Enter Your Prompt")
-        prompt = st.text_area(
-            "Prompt:",
-            placeholder="Enter your processing prompt here...",
-            height=150,
-            help="This prompt will guide how Gemini processes the transcript"
-        )
-        
-        # Transcript input
-        st.subheader("📄 Enter Transcript")
-        transcript = st.text_area(
-            "Transcript:",
-            placeholder="Paste your transcript here...",
-            height=300,
-            help="The transcript to be processed according to your prompt"
-        )
+        # Batch inputs in a form so typing does not rerun the script until submit
+        with st.form("text_form"):
+            # Prompt input
+            st.subheader("📋 Enter Your Prompt")
+            prompt = st.text_area(
+                "Prompt:",
+                placeholder="Enter your processing prompt here...",
+                height=150,
+                help="This prompt will guide how Gemini processes the transcript"
+            )
+            
+            # Transcript input
+            st.subheader("📄 Enter Transcript")
+            transcript = st.text_area(
+                "Transcript:",
+                placeholder="Paste your transcript here...",
+                height=300,
+                help="The transcript to be processed according to your prompt"
+            )
+            
+            # Process button
+            submitted = st.form_submit_button("🚀 Process with Gemini", type="primary")
         
-        # Process button
-        if st.button("🚀 Process with Gemini", type="primary"):
+        if submitted:
             if not prompt.strip():
                 st.warning("⚠️ Please enter a prompt")
             elif not transcript.strip():
@@ -347,26 +756,19 @@ def main():
                     result = process_text_with_gemini(prompt, transcript)
                     
                     if result:
+                        st.session_state["last_result"] = result
                         st.markdown('<div class="success-box">', unsafe_allow_html=True)
                         st.success("✅ Processing completed successfully!")
                         st.markdown('</div>', unsafe_allow_html=True)
-                        
-                        # Display result
-                        st.subheader("📊 Processed Result")
-                        st.text_area("Result", result, height=400, disabled=True)
-                        
-                        # Download button
-                        st.download_button(
-                            label="📥 Download Result",
-                            data=result,
-                            file_name=f"processed_result_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
-                            mime="text/plain"
-                        )
                     else:
                         st.markdown('<div class="error-box">', unsafe_allow_html=True)
                         st.error("❌ Failed to process. Please try again.")
                         st.markdown('</div>', unsafe_allow_html=True)
         
+        # Display the result from the last successful run
+        if st.session_state["last_result"]:
+            render_processed_result(st.session_state["last_result"])
+        
         st.markdown('</div>', unsafe_allow_html=True)
     
     # Footer